@@ -1,36 +1,68 @@
 import os
 import getpass
 import logging
+from functools import lru_cache
 from dotenv import load_dotenv
 
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    force=True
-)
 logger = logging.getLogger(__name__)
 
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, "false").strip().lower() in ("1", "true", "yes")
+
 class Config:
     @staticmethod
     def load():
         load_dotenv()
         
+        if not logging.getLogger().handlers:
+            logging.basicConfig(
+                level=os.environ.get("LOG_LEVEL", "WARNING").upper(),
+                format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+            )
+        
         if not os.environ.get("AZURE_OPENAI_ENDPOINT"):
             os.environ["AZURE_OPENAI_ENDPOINT"] = "https://lxproductinternal.openai.azure.com/openai/deployments/openai-gpt-4.1-deployment/chat/completions?api-version=2025-01-01-preview"
         
         logger.info("Environment variables loaded successfully")
 
     @staticmethod
+    def max_raw_content_chars() -> int:
+        # Search content is embedded in both verification prompts, so this bounds their size
+        return int(os.environ.get("MAX_RAW_CONTENT_CHARS", "24000"))
+
+    @staticmethod
+    def pplx_timeout_secs() -> float:
+        return float(os.environ.get("PPLX_TIMEOUT_SECS", "60"))
+
+    @staticmethod
+    def pplx_deep_timeout_secs() -> float:
+        return float(os.environ.get("PPLX_DEEP_TIMEOUT_SECS", "300"))
+
+    @staticmethod
+    def pplx_stream_early_stop() -> bool:
+        return _env_flag("PPLX_STREAM_EARLY_STOP")
+
+    @staticmethod
+    def speculative_deep_search() -> bool:
+        return _env_flag("SPECULATIVE_DEEP_SEARCH")
+
+    @staticmethod
+    def use_llm_query_gen() -> bool:
+        return _env_flag("USE_LLM_QUERY_GEN")
+
+    @staticmethod
+    @lru_cache(maxsize=1)
     def get_llm():
         from langchain_openai import AzureChatOpenAI
         
+        deployment = "openai-gpt-4.1-deployment"
         llm = AzureChatOpenAI(
-            azure_deployment="openai-gpt-4.1-deployment",
+            azure_deployment=deployment,
             api_version="2025-01-01-preview",
             temperature=0,
             max_tokens=None,
             timeout=None,
             max_retries=3,
         )
-        logger.info("Azure OpenAI LLM initialized")
-        return llm
\ No newline at end of file
+        logger.info("Azure OpenAI LLM initialized: deployment=%s", deployment)
+        return llm
@@ -1,28 +1,53 @@
 import argparse
 import csv
+import io
 import json
 import os
 import re
+from bisect import bisect_left
 from dataclasses import dataclass
 from datetime import datetime, date
+from functools import lru_cache
+from operator import attrgetter
 from typing import Dict, List, Optional, Tuple
 
+try:
+    from orjson import loads as _json_loads
+except ImportError:  # orjson is optional; stdlib json.loads accepts bytes too
+    _json_loads = json.loads
+
 EVAL_CSV_PATH = os.path.join(os.path.dirname(__file__), 'evaluation_set', 'evaluation_set.csv')
 OUTPUTS_DIR = os.path.join(os.path.dirname(__file__), 'outputs')
 EVAL_REPORTS_DIR = os.path.join(os.path.dirname(__file__), 'evaluations')
 
+_LEADING_NUM_RE = re.compile(r'^\d+\s*')
+_WS_RE = re.compile(r'\s+')
+_BATCH_ID_RE = re.compile(r'catalog_research_results_(\d{8})_(\d{6})\.json')
+
+# Upper bounds (inclusive, in days) of the non-zero delta buckets; anything larger lands in the last label
+_DELTA_BUCKET_BOUNDS = (1, 3, 7, 30, 90)
+_DELTA_BUCKET_LABELS = ('<= 1 day', '<= 3 days', '<= 7 days', '<= 30 days', '<= 90 days', '> 90 days')
+_READ_BUFFER_SIZE = 1 << 20  # 1 MiB; evaluation inputs are read start to finish in one go
+# Below this many deltas the pure-Python loop is faster than importing and calling numpy
+_NUMPY_BUCKETIZE_MIN = 1024
+
 
 
 @dataclass
 class EvalRow:
+    # Explicit __slots__ rather than dataclass(slots=True), which needs Python 3.10+
+    __slots__ = ('full_name', 'phase_type', 'target_date_raw', 'status', 'target_is_nf', 'key')
     full_name: str
     phase_type: str  # 'ACTIVE_DATE' | 'END_OF_LIFE_DATE'
     target_date_raw: str  # 'YYYY-MM-DD' or 'NOT_FOUND'
     status: str
+    target_is_nf: bool  # target_date_raw is NOT_FOUND
+    key: str  # normalize_name(full_name), used to match against outputs
 
 
 @dataclass
 class OutputRow:
+    __slots__ = ('component', 'active_date', 'eos_date')
     component: str
     active_date: Optional[str]
     eos_date: Optional[str]
@@ -30,6 +55,17 @@ class OutputRow:
 
 @dataclass
 class Comparison:
+    __slots__ = (
+        'component',
+        'phase_type',
+        'target_date',
+        'predicted_date',
+        'predicted_other_date',
+        'exact_match',
+        'exact_nf_match',
+        'wrong_phase_match',
+        'abs_days_delta',
+    )
     component: str
     phase_type: str
     target_date: Optional[date]  # None if NOT_FOUND
@@ -43,6 +79,22 @@ class Comparison:
 
 @dataclass
 class Metrics:
+    __slots__ = (
+        'csv_rows',
+        'evaluated_rows',
+        'targets_null',
+        'outputs_null',
+        'targets_with_date',
+        'outputs_with_date',
+        'exact_matches',
+        'exact_nf_matches',
+        'exact_date_matches',
+        'mismatches_total',
+        'mismatched_dates',
+        'mismatches_pred_null_target_date',
+        'mismatches_pred_date_target_null',
+        'delta_buckets',
+    )
     # Totals
     csv_rows: int
     evaluated_rows: int  # total components evaluated (matched)
@@ -71,9 +123,8 @@ def normalize_name(name: str) -> str:
     """Normalize component names for matching between CSV and outputs."""
     if name is None:
         return ''
-    s = name.strip()
-    s = re.sub(r'^\d+\s*', '', s)  # drop leading index numbers if present (e.g., "1     Foo")
-    s = re.sub(r'\s+', ' ', s)  # collapse whitespace
+    s = _LEADING_NUM_RE.sub('', name.strip())  # drop leading index numbers if present (e.g., "1     Foo")
+    s = _WS_RE.sub(' ', s)  # collapse whitespace
     return s.lower()
 
 
@@ -84,7 +135,20 @@ def parse_iso_date(value: Optional[str]) -> Optional[date]:
     s = str(value).strip()
     if s.upper() == 'NOT_FOUND':
         return None
+    return _parse_date_str(s)
+
+
+@lru_cache(maxsize=4096)
+def _parse_date_str(s: str) -> Optional[date]:
+    # Only dashed YYYY-MM-DD takes the fast path; on 3.11+ fromisoformat also accepts
+    # compact and ISO week dates, which strptime (and older Pythons) reject
+    if len(s) >= 10 and s[4] == '-' and s[7] == '-':
+        try:
+            return date.fromisoformat(s[:10])
+        except ValueError:
+            pass
     try:
+        # strptime also accepts non-zero-padded parts such as '2022-1-5'
         return datetime.strptime(s[:10], '%Y-%m-%d').date()
     except Exception:
         return None
@@ -95,6 +159,14 @@ def parse_iso_date(value: Optional[str]) -> Optional[date]:
 # -----------------------------
 
 class LifecycleEvaluator:
+    # phase_type -> getter returning the (expected, other) predicted dates of an OutputRow;
+    # any phase other than ACTIVE_DATE is compared against eos_date
+    _EOS_FIELDS = attrgetter('eos_date', 'active_date')
+    _PREDICTED_FIELDS = {
+        'ACTIVE_DATE': attrgetter('active_date', 'eos_date'),
+        'END_OF_LIFE_DATE': _EOS_FIELDS,
+    }
+
     def __init__(self, evaluation_csv_path: str = EVAL_CSV_PATH, outputs_dir: str = OUTPUTS_DIR) -> None:
         self.evaluation_csv_path = evaluation_csv_path
         self.outputs_dir = outputs_dir
@@ -105,29 +177,47 @@ class LifecycleEvaluator:
         path = output_filename
         if not os.path.isabs(path):
             path = os.path.join(self.outputs_dir, output_filename)
-        with open(path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        results: Dict[str, OutputRow] = {}
-        for item in data.get('results', []):
-            component_name = item.get('component') or ''
-            key = normalize_name(component_name)
-            results[key] = OutputRow(
-                component=component_name,
+        with open(path, 'rb') as f:
+            data = _json_loads(f.read())
+        # Items whose component normalizes to '' can never match a CSV row, so they are skipped
+        return {
+            key: OutputRow(
+                component=item['component'],
                 active_date=item.get('active_date'),
                 eos_date=item.get('eos_date'),
             )
-        return results
+            for item in data.get('results', [])
+            if (key := normalize_name(item.get('component')))
+        }
 
     def _load_eval_rows(self) -> List[EvalRow]:
         rows: List[EvalRow] = []
-        with open(self.evaluation_csv_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
+        with open(self.evaluation_csv_path, 'r', encoding='utf-8', newline='', buffering=_READ_BUFFER_SIZE) as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if not header:
+                return rows
+            # Like DictReader: absent columns and missing trailing fields read as ''
+            i_name, i_type, i_target, i_status = (
+                header.index(col) if col in header else None
+                for col in ('full_name', 'type', 'target_date', 'status')
+            )
+
+            def field(r: List[str], i: Optional[int]) -> str:
+                return r[i].strip() if i is not None and i < len(r) else ''
+
             for r in reader:
+                if not r:
+                    continue
+                full_name = field(r, i_name)
+                target_date_raw = field(r, i_target)
                 rows.append(EvalRow(
-                    full_name=(r.get('full_name') or '').strip(),
-                    phase_type=(r.get('type') or '').strip().upper(),
-                    target_date_raw=(r.get('target_date') or '').strip(),
-                    status=(r.get('status') or '').strip(),
+                    full_name=full_name,
+                    phase_type=field(r, i_type).upper(),
+                    target_date_raw=target_date_raw,
+                    status=field(r, i_status),
+                    target_is_nf=target_date_raw.upper() == 'NOT_FOUND',
+                    key=normalize_name(full_name),
                 ))
         return rows
 
@@ -137,18 +227,17 @@ class LifecycleEvaluator:
         if out_row is None:
             return None
 
-        expected_field = 'active_date' if eval_row.phase_type == 'ACTIVE_DATE' else 'eos_date'
-        other_field = 'eos_date' if expected_field == 'active_date' else 'active_date'
-
-        expected_pred_raw = getattr(out_row, expected_field)
-        other_pred_raw = getattr(out_row, other_field)
+        get_fields = self._PREDICTED_FIELDS.get(eval_row.phase_type, self._EOS_FIELDS)
+        expected_pred_raw, other_pred_raw = get_fields(out_row)
 
         target_dt = parse_iso_date(eval_row.target_date_raw)
-        expected_pred_dt = parse_iso_date(expected_pred_raw)
+        # target_date_raw is stripped at load time; identical date prefixes parse to the same value
+        same_raw = bool(expected_pred_raw) and str(expected_pred_raw).strip()[:10] == eval_row.target_date_raw[:10]
+        expected_pred_dt = target_dt if same_raw else parse_iso_date(expected_pred_raw)
         other_pred_dt = parse_iso_date(other_pred_raw)
 
-        exact_nf_match = eval_row.target_date_raw.strip().upper() == 'NOT_FOUND' and expected_pred_dt is None
-        exact_date_match = (target_dt is not None and expected_pred_dt is not None and target_dt == expected_pred_dt)
+        exact_nf_match = eval_row.target_is_nf and expected_pred_dt is None
+        exact_date_match = target_dt is not None and (same_raw or target_dt == expected_pred_dt)
 
         # Wrong-phase if the "other" field equals target while expected is missing or different
         wrong_phase_match = (
@@ -159,8 +248,10 @@ class LifecycleEvaluator:
         )
 
         abs_days_delta: Optional[int] = None
-        if target_dt is not None and expected_pred_dt is not None:
-            abs_days_delta = abs((expected_pred_dt - target_dt).days)
+        if exact_date_match:
+            abs_days_delta = 0
+        elif target_dt is not None and expected_pred_dt is not None:
+            abs_days_delta = abs(expected_pred_dt.toordinal() - target_dt.toordinal())
 
         return Comparison(
             component=out_row.component,
@@ -177,49 +268,61 @@ class LifecycleEvaluator:
     # -------- aggregation & reporting --------
 
     def _bucketize_nonzero(self, values: List[int]) -> Dict[str, int]:
-        buckets = {
-            '<= 1 day': 0,
-            '<= 3 days': 0,
-            '<= 7 days': 0,
-            '<= 30 days': 0,
-            '<= 90 days': 0,
-            '> 90 days': 0,
-        }
+        if len(values) >= _NUMPY_BUCKETIZE_MIN:
+            try:
+                import numpy as np
+            except ImportError:  # numpy is optional
+                np = None
+            if np is not None:
+                arr = np.fromiter(values, dtype=np.int64, count=len(values))
+                idx = np.searchsorted(_DELTA_BUCKET_BOUNDS, arr[arr > 0], side='left')
+                counts = np.bincount(idx, minlength=len(_DELTA_BUCKET_LABELS)).tolist()
+                return dict(zip(_DELTA_BUCKET_LABELS, counts))
+
+        counts = [0] * len(_DELTA_BUCKET_LABELS)
         for v in values:
             if v <= 0:
                 continue
-            if v <= 1:
-                buckets['<= 1 day'] += 1
-            elif v <= 3:
-                buckets['<= 3 days'] += 1
-            elif v <= 7:
-                buckets['<= 7 days'] += 1
-            elif v <= 30:
-                buckets['<= 30 days'] += 1
-            elif v <= 90:
-                buckets['<= 90 days'] += 1
-            else:
-                buckets['> 90 days'] += 1
-        return buckets
+            counts[bisect_left(_DELTA_BUCKET_BOUNDS, v)] += 1
+        return dict(zip(_DELTA_BUCKET_LABELS, counts))
 
     def _aggregate(self, comparisons: List[Comparison], total_rows: int) -> Metrics:
         evaluated_rows = len(comparisons)
 
-        targets_null = sum(1 for c in comparisons if c.target_date is None)
-        outputs_null = sum(1 for c in comparisons if c.predicted_date is None)
+        targets_null = 0
+        outputs_null = 0
+        exact_nf_matches = 0
+        exact_date_matches = 0
+        mismatches_pred_null_target_date = 0
+        mismatches_pred_date_target_null = 0
+        deltas_nonzero: List[int] = []
+
+        # Single pass over comparisons; every metric is derived from the target/predicted pair
+        # and the match flags/deltas already computed in _compare_row
+        for c in comparisons:
+            target_dt = c.target_date
+            predicted_dt = c.predicted_date
+            if target_dt is None:
+                targets_null += 1
+                if predicted_dt is None:
+                    outputs_null += 1
+                    exact_nf_matches += 1
+                else:
+                    mismatches_pred_date_target_null += 1
+            elif predicted_dt is None:
+                outputs_null += 1
+                mismatches_pred_null_target_date += 1
+            elif c.exact_match:
+                exact_date_matches += 1
+            else:
+                # Both dates present and different, so abs_days_delta is set and non-zero
+                deltas_nonzero.append(c.abs_days_delta)
+
         targets_with_date = evaluated_rows - targets_null
         outputs_with_date = evaluated_rows - outputs_null
-
-        exact_nf_matches = sum(1 for c in comparisons if c.target_date is None and c.predicted_date is None)
-        exact_date_matches = sum(1 for c in comparisons if (c.target_date is not None and c.predicted_date is not None and c.target_date == c.predicted_date))
         exact_matches = exact_nf_matches + exact_date_matches
-
-        mismatches_pred_null_target_date = sum(1 for c in comparisons if (c.target_date is not None and c.predicted_date is None))
-        mismatches_pred_date_target_null = sum(1 for c in comparisons if (c.target_date is None and c.predicted_date is not None))
-        mismatched_dates = sum(1 for c in comparisons if (c.target_date is not None and c.predicted_date is not None and c.target_date != c.predicted_date))
+        mismatched_dates = len(deltas_nonzero)
         mismatches_total = mismatches_pred_null_target_date + mismatches_pred_date_target_null + mismatched_dates
-
-        deltas_nonzero = [c.abs_days_delta for c in comparisons if c.abs_days_delta is not None and c.abs_days_delta > 0]
         delta_buckets = self._bucketize_nonzero(deltas_nonzero)
 
         return Metrics(
@@ -241,18 +344,20 @@ class LifecycleEvaluator:
 
     @staticmethod
     def _format_table(rows: List[Tuple[str, str]], headers: Tuple[str, str]) -> str:
-        col1_width = max(len(headers[0]), *(len(r[0]) for r in rows)) if rows else len(headers[0])
-        col2_width = max(len(headers[1]), *(len(r[1]) for r in rows)) if rows else len(headers[1])
+        col1_width, col2_width = len(headers[0]), len(headers[1])
+        for k, v in rows:
+            if len(k) > col1_width:
+                col1_width = len(k)
+            if len(v) > col2_width:
+                col2_width = len(v)
         sep = '+-' + '-' * col1_width + '-+-' + '-' * col2_width + '-+'
-        lines = [
-            sep,
-            '| ' + headers[0].ljust(col1_width) + ' | ' + headers[1].rjust(col2_width) + ' |',
-            sep,
-        ]
+        buf = io.StringIO()
+        w = buf.write
+        w(f"{sep}\n| {headers[0].ljust(col1_width)} | {headers[1].rjust(col2_width)} |\n{sep}\n")
         for k, v in rows:
-            lines.append('| ' + k.ljust(col1_width) + ' | ' + v.rjust(col2_width) + ' |')
-        lines.append(sep)
-        return '\n'.join(lines)
+            w(f"| {k.ljust(col1_width)} | {v.rjust(col2_width)} |\n")
+        w(sep)
+        return buf.getvalue()
 
     @staticmethod
     def _pct(a: int, b: int) -> float:
@@ -260,20 +365,13 @@ class LifecycleEvaluator:
 
     def _derive_batch_id(self, output_file_arg: str) -> str:
         fname = os.path.basename(output_file_arg)
-        m = re.match(r'catalog_research_results_(\d{8})_(\d{6})\.json', fname)
+        m = _BATCH_ID_RE.match(fname)
         if m:
             return m.group(2)
         return datetime.now().strftime('%Y%m%d_%H%M%S')
 
     def _build_report_text(self, output_file_arg: str, m: Metrics) -> str:
-        lines: List[str] = []
-        lines.append('\nEvaluation run')
-        lines.append('==============')
-        lines.append(f"Evaluation CSV: {self.evaluation_csv_path}")
         out_disp = output_file_arg if os.path.isabs(output_file_arg) else os.path.join(self.outputs_dir, output_file_arg)
-        lines.append(f"Outputs JSON  : {out_disp}")
-        lines.append(f"Rows in CSV: {m.csv_rows}")
-        lines.append('')
         overview_rows = [
             ("Total components evaluated", f"{m.evaluated_rows}"),
             ("Total reference NULL target dates", f"{m.targets_null}"),
@@ -281,8 +379,6 @@ class LifecycleEvaluator:
             ("Total targets with date", f"{m.targets_with_date}"),
             ("Total outputs with date", f"{m.outputs_with_date}"),
         ]
-        lines.append(self._format_table(overview_rows, ("Metric", "Count")))
-        lines.append('')
         phase_rows = [
             ("Exact matches (overall)", f"{m.exact_matches} ({self._pct(m.exact_matches, m.evaluated_rows):.1f}%)"),
             ("  • NOT_FOUND aligned", f"{m.exact_nf_matches} ({self._pct(m.exact_nf_matches, m.evaluated_rows):.1f}%)"),
@@ -292,11 +388,21 @@ class LifecycleEvaluator:
             ("  • Mismatch: predicted NULL, target has date", f"{m.mismatches_pred_null_target_date}"),
             ("  • Mismatch: predicted date present, target NULL", f"{m.mismatches_pred_date_target_null}"),
         ]
-        lines.append(self._format_table(phase_rows, ("Phase Metrics", "Value")))
-        lines.append('')
         bucket_rows = [(k, str(v)) for k, v in m.delta_buckets.items()]
-        lines.append(self._format_table(bucket_rows, ("Date Delta Buckets (non-exact)", "Count")))
-        return '\n'.join(lines)
+
+        buf = io.StringIO()
+        w = buf.write
+        w('\nEvaluation run\n')
+        w('==============\n')
+        w(f"Evaluation CSV: {self.evaluation_csv_path}\n")
+        w(f"Outputs JSON  : {out_disp}\n")
+        w(f"Rows in CSV: {m.csv_rows}\n\n")
+        w(self._format_table(overview_rows, ("Metric", "Count")))
+        w('\n\n')
+        w(self._format_table(phase_rows, ("Phase Metrics", "Value")))
+        w('\n\n')
+        w(self._format_table(bucket_rows, ("Date Delta Buckets (non-exact)", "Count")))
+        return buf.getvalue()
 
     def _save_report(self, report_text: str, output_file_arg: str) -> str:
         os.makedirs(EVAL_REPORTS_DIR, exist_ok=True)
@@ -315,8 +421,7 @@ class LifecycleEvaluator:
 
         comparisons: List[Comparison] = []
         for r in eval_rows:
-            key = normalize_name(r.full_name)
-            out_row = outputs_map.get(key)
+            out_row = outputs_map.get(r.key)
             cmp_res = self._compare_row(r, out_row)
             if cmp_res is None:
                 continue
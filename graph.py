@@ -12,8 +12,12 @@ class CatalogResearchGraph:
         self.llm = Config.get_llm()
         self.nodes = Nodes(self.llm)
         self.memory = InMemorySaver()
+        self._graph = None
     
     def build(self):
+        if self._graph is not None:
+            return self._graph
+        
         graph_builder = StateGraph(ResearchState)
         
         graph_builder.add_node("research", self.nodes.research_node)
@@ -33,7 +37,7 @@ class CatalogResearchGraph:
         
         graph_builder.add_edge("output_generation", END)
         
-        graph = graph_builder.compile(checkpointer=self.memory)
+        self._graph = graph_builder.compile(checkpointer=self.memory)
         logger.info("Catalog Research graph compiled successfully")
-        return graph 
+        return self._graph
     
\ No newline at end of file
@@ -1,29 +1,35 @@
 import asyncio
 import json
 import time
+import uuid
 from typing import List, Dict, Any
-from datetime import datetime
+from datetime import datetime, timezone
 from config import Config
-from graph import CatalogResearchGraph
+
+try:
+    import orjson
+
+    def _dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:  # orjson is optional; stdlib json produces the same layout
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
 
 class CatalogResearchRunner:
     def __init__(self, max_concurrent: int = 3):
+        from graph import CatalogResearchGraph
+        
         self.max_concurrent = max_concurrent
-        self.graph = None
-    
-    def _init_graph(self):
-        if not self.graph:
-            Config.load()
-            self.graph = CatalogResearchGraph().build()
+        Config.load()
+        self.graph = CatalogResearchGraph().build()
     
     async def _process_component(self, component: str, semaphore: asyncio.Semaphore) -> Dict[str, Any]:
         async with semaphore:
-            self._init_graph()
-            
-            config = {"configurable": {"thread_id": f"batch_{component}_{int(time.time())}"}}
+            config = {"configurable": {"thread_id": f"batch_{component}_{uuid.uuid4().hex}"}}
             input_state = {
                 "component": component,
                 "search_history": [],
+                "seen_queries": set(),
                 "current_results": None,
                 "confidence_score": 0.0,
                 "iteration_count": 0,
@@ -34,15 +40,16 @@ class CatalogResearchRunner:
             }
             
             try:
-                start_time = time.time()
-                final_state = await asyncio.to_thread(self.graph.invoke, input_state, config)
-                processing_time = time.time() - start_time
+                start_time = time.perf_counter()
+                timestamp = datetime.now(timezone.utc).isoformat()
+                final_state = await self.graph.ainvoke(input_state, config)
+                processing_time = time.perf_counter() - start_time
                 
                 result = {
                     "component": component,
                     "processing_time": processing_time,
                     "status": "completed",
-                    "timestamp": datetime.now().isoformat()
+                    "timestamp": timestamp
                 }
                 
                 if 'output' in final_state and final_state['output']:
@@ -61,42 +68,48 @@ class CatalogResearchRunner:
                     "component": component,
                     "status": "failed",
                     "error": str(e),
-                    "processing_time": time.time() - start_time,
-                    "timestamp": datetime.now().isoformat()
+                    "processing_time": time.perf_counter() - start_time,
+                    "timestamp": timestamp
                 }
     
-    async def run_batch(self, components: List[str]) -> Dict[str, Any]:
+    async def run_batch(self, components: List[str], fpath: str = './outputs', filename: str = None) -> Dict[str, Any]:
+        if not filename:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"catalog_research_results_{timestamp}.json"
+        
         semaphore = asyncio.Semaphore(self.max_concurrent)
         
         print(f"🔍 Catalog Research Agent - Processing {len(components)} components...")
-        start_time = time.time()
+        start_time = time.perf_counter()
         
-        tasks = [self._process_component(comp, semaphore) for comp in components]
-        results = await asyncio.gather(*tasks)
+        # Create the tasks up front so components start in input order
+        tasks = [asyncio.ensure_future(self._process_component(comp, semaphore)) for comp in components]
+        successful = 0
         
-        total_time = time.time() - start_time
-        successful = len([r for r in results if r.get('status') == 'completed'])
-        
-        return {
-            "batch_metadata": {
+        # Results are written as they complete (so only one is held at a time and the file can
+        # be tailed), while keeping the {"results": [...], "batch_metadata": {...}} layout
+        with open(fpath + '/' + filename, 'wb') as f:
+            f.write(b'{\n  "results": [')
+            for i, next_result in enumerate(asyncio.as_completed(tasks)):
+                result = await next_result
+                if result.get('status') == 'completed':
+                    successful += 1
+                f.write(b'\n    ' if i == 0 else b',\n    ')
+                f.write(_dumps(result).replace(b'\n', b'\n    '))
+                f.flush()
+            
+            batch_metadata = {
                 "total_components": len(components),
                 "successful": successful,
                 "failed": len(components) - successful,
-                "processing_time": total_time,
-                "timestamp": datetime.now().isoformat()
-            },
-            "results": results
-        }
-    
-    def export_json(self, batch_results: Dict[str, Any], fpath: str = './outputs', filename: str = None) -> str:
-        if not filename:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"catalog_research_results_{timestamp}.json"
-        
-        with open(fpath + '/' + filename, 'w') as f:
-            json.dump(batch_results, f, indent=4)
+                "processing_time": time.perf_counter() - start_time,
+                "timestamp": datetime.now(timezone.utc).isoformat()
+            }
+            f.write(b'\n  ],\n  "batch_metadata": ')
+            f.write(_dumps(batch_metadata).replace(b'\n', b'\n  '))
+            f.write(b'\n}\n')
         
-        return filename
+        return {"batch_metadata": batch_metadata, "filename": filename}
 
 def load_components(file_path: str) -> List[str]:
     with open(file_path, 'r') as f:
@@ -125,14 +138,21 @@ async def main():
     components = load_components(components_file)
     runner = CatalogResearchRunner(max_concurrent)
     
+    from tools import warmup_search_client
+    await warmup_search_client()
+    
     batch_results = await runner.run_batch(components)
-    filename = runner.export_json(batch_results)
     
     print("\n BATCH RESULTS")
     print("=" * 60)
     print(f" Completed: {batch_results['batch_metadata']['successful']}/{batch_results['batch_metadata']['total_components']}")
     print(f" Processing time: {batch_results['batch_metadata']['processing_time']:.2f} seconds")
-    print(f" Results exported to: {filename}")
+    print(f" Results exported to: {batch_results['filename']}")
 
 if __name__ == "__main__":
-    asyncio.run(main()) 
\ No newline at end of file
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main())
+    else:
+        uvloop.run(main()) 
\ No newline at end of file
@@ -1,4 +1,5 @@
-from typing import Annotated, List, Optional, Dict, Any
+import operator
+from typing import Annotated, List, Optional, Dict, Any, Set
 from typing_extensions import TypedDict
 from pydantic import BaseModel, Field
 from langgraph.graph.message import add_messages
@@ -9,23 +10,17 @@ class SourceAttribution(BaseModel):
     credibility_score: Optional[float] = Field(default=None, description="Credibility score (0-100)")
     content_snippet: Optional[str] = Field(default=None, description="Relevant excerpt")
 
-class ComponentData(BaseModel):
-    description: Optional[str]
-    description_sources: List[SourceAttribution]
-    active_date: Optional[str] = Field(description="Active date in ISO format (YYYY-MM-DD)")
-    active_date_sources: List[SourceAttribution]
-    eos_date: Optional[str] = Field(description="End of support date in ISO format (YYYY-MM-DD)")
-    eos_date_sources: List[SourceAttribution]
-
 class SearchAttempt(TypedDict):
     query: str
     mode: str
-    results: dict
+    content_id: str  # key of the raw search result held by Nodes, outside checkpointed state
     confidence: float
 
 class ResearchState(TypedDict):
     component: str
-    search_history: List[SearchAttempt]
+    # Reducers merge node updates: nodes return only the new attempt / query
+    search_history: Annotated[List[SearchAttempt], operator.add]
+    seen_queries: Annotated[Set[str], operator.or_]
     current_results: Optional[Dict[str, Any]]
     confidence_score: float
     iteration_count: int
@@ -35,16 +30,6 @@ class ResearchState(TypedDict):
     verification_notes: Optional[str]
     output: Optional[Dict[str, Any]]
 
-class VerificationResult(BaseModel):
-    description: Optional[str]
-    description_sources: List[SourceAttribution]
-    active_date: Optional[str] = Field(description="Active date in ISO format (YYYY-MM-DD)")
-    active_date_sources: List[SourceAttribution]
-    eos_date: Optional[str] = Field(description="End of support date in ISO format (YYYY-MM-DD)")
-    eos_date_sources: List[SourceAttribution]
-    overall_confidence: float
-    verification_notes: str 
-
 class ActiveVerificationResult(BaseModel):
     active_date: Optional[str] = Field(description="Active/GA/Release date in ISO format (YYYY-MM-DD)")
     active_date_sources: List[SourceAttribution]
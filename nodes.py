@@ -1,6 +1,15 @@
+import asyncio
+import hashlib
 import logging
-from langchain_core.messages import HumanMessage
-from models import ResearchState, SearchAttempt, ActiveVerificationResult, EosVerificationResult
+import re
+from functools import partial
+from itertools import chain
+from operator import itemgetter
+from langchain_core.messages import HumanMessage, SystemMessage
+from typing import List, Tuple
+from langchain_core.runnables import RunnableConfig, RunnableParallel
+from pydantic import TypeAdapter
+from models import ResearchState, SearchAttempt, SourceAttribution, ActiveVerificationResult, EosVerificationResult
 from config import Config
 from prompt_loader import prompt_loader
 from tools import initial_search
@@ -8,132 +17,237 @@ from tools import deep_search
 
 logger = logging.getLogger(__name__)
 
+_SOURCES_ADAPTER = TypeAdapter(List[SourceAttribution])
+
+_MAX_ITERATIONS = 2
+_ACTIVE_THRESHOLD = 85.0
+_EOS_THRESHOLD = 85.0
+_EOS_OK_STATUSES = frozenset({"verified", "derived"})
+_CREDIBILITY_THRESHOLD = 70
+_TRADEMARK_RE = re.compile(r"[\u2122\u00ae\u00a9]|\((?:TM|R|C)\)", re.IGNORECASE)
+_WS_RE = re.compile(r"\s+")
+_PARAGRAPH_SPLIT_RE = re.compile(r"\n\s*\n")
+_WORD_RE = re.compile(r"\w+")
+_LIFECYCLE_KEYWORD_RE = re.compile(
+    r"end[- ]of[- ](?:life|support|maintenance)|\bEO[LS]\b|support|lifecycle|retire|release|"
+    r"general availability|\bGA\b|launch|\b\d{4}-\d{2}-\d{2}\b|https?://",
+    re.IGNORECASE,
+)
+# First line only, minus wrapping quotes and a "Query:" prefix; quotes inside the query are kept
+_QUERY_CLEAN_RE = re.compile(r'\s*(?:"(?:Query:)?([^\n]*)"|(?:Query:)?([^\n]*?))\s*(?:\n|$)')
+
+
+def score_sources(urls_and_scores, verified: List[str], failed: List[str]) -> Tuple[List[str], List[str]]:
+    """Split (url, credibility_score) pairs into verified and failed URL lists."""
+    # Build fresh de-duplicated collections (dicts keep first-seen order) instead of
+    # appending to the lists held in graph state, which grew with every iteration
+    verified_sources = dict.fromkeys(verified)
+    failed_sources = dict.fromkeys(failed)
+
+    for url, score in urls_and_scores:
+        if url is None or url in verified_sources:
+            continue
+        if (score or 0.0) >= _CREDIBILITY_THRESHOLD:
+            verified_sources[url] = None
+            failed_sources.pop(url, None)
+        else:
+            failed_sources[url] = None
+
+    return list(verified_sources), list(failed_sources)
+
+
 class Nodes:
     def __init__(self, llm):
         self.llm = llm
         self.llm_json = llm.bind(response_format={"type": "json_object"})
         self.active_verification_llm = self.llm_json.with_structured_output(ActiveVerificationResult)
         self.eos_verification_llm = self.llm_json.with_structured_output(EosVerificationResult)
+        # Active and EOS checks are independent, so both LLM calls are issued concurrently
+        self.verification_llm = RunnableParallel(
+            active=itemgetter('active') | self.active_verification_llm,
+            eos=itemgetter('eos') | self.eos_verification_llm,
+        )
+        self._use_llm_query_gen = Config.use_llm_query_gen()
+        self._query_tpl = prompt_loader.compile("research", "query_template")
+        self._qgen_tpl = prompt_loader.compile("research", "query_generation")
+        # Static instructions go in the system message so providers can cache the prompt prefix
+        self._active_system = SystemMessage(content=prompt_loader.get_prompt("verification_active", "analysis_system"))
+        self._eos_system = SystemMessage(content=prompt_loader.get_prompt("verification_eos", "analysis_system"))
+        self._active_tpl = prompt_loader.compile("verification_active", "analysis_user")
+        self._eos_tpl = prompt_loader.compile("verification_eos", "analysis_user")
+        self._max_raw_content_chars = Config.max_raw_content_chars()
+        self._query_cache = {}
+        self._verification_cache = {}
+        # Raw search payloads live here, keyed by SearchAttempt.content_id, so the
+        # checkpointer does not re-serialize them on every graph transition
+        self._search_results = {}
+        # Opt-in: start the generic deep search alongside verification, keyed by thread_id
+        self._speculate_deep_search = Config.speculative_deep_search()
+        self._speculative_searches = {}
     
-    def _check_duplicate_search(self, search_history: list, query: str) -> bool:
-        return any(attempt.get('query') == query for attempt in search_history)
-    
-    def _generate_search_query(self, component: str) -> str:
-        query_prompt = prompt_loader.get_prompt("research", "query_generation", component=component)
-        logger.debug(f"LLM query generation prompt: {query_prompt}")
+    async def _generate_search_query(self, component: str) -> str:
+        if not self._use_llm_query_gen:
+            cleaned = _WS_RE.sub(" ", _TRADEMARK_RE.sub("", component)).strip()
+            return self._query_tpl(component=cleaned)
+        
+        query_prompt = self._qgen_tpl(component=component)
+        # Keyed on the rendered prompt, so a changed template never reuses stale queries
+        cached = self._query_cache.get(query_prompt)
+        if cached is not None:
+            logger.info("Query generation cache hit for component: %s", component)
+            return cached
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("LLM query generation prompt: %s", query_prompt)
         
-        query_msg = self.llm.invoke([HumanMessage(content=query_prompt)])
-        query = query_msg.content.strip()
+        query_msg = await self.llm.ainvoke([HumanMessage(content=query_prompt)])
+        query = self._clean_query(query_msg.content.strip())
         
-        return self._clean_query(query)
+        self._query_cache[query_prompt] = query
+        return query
     
     def _clean_query(self, query: str) -> str:
-        if '\n' in query:
-            query = query.split('\n')[0].strip()
-        if query.startswith('"') and query.endswith('"'):
-            query = query[1:-1]
-        if query.startswith("Query:"):
-            query = query[6:].strip()
-        return query
+        match = _QUERY_CLEAN_RE.match(query)
+        return (match.group(1) if match.group(1) is not None else match.group(2)).strip()
+    
+    async def _execute_search(self, query: str):
+        return await initial_search.ainvoke({'query': query})
     
-    def _execute_search(self, query: str):
-        return initial_search.invoke({'query': query})
+    def _store_search_result(self, config: RunnableConfig, search_history: list, tool_result: dict) -> str:
+        content_id = f"{config['configurable']['thread_id']}:{len(search_history)}"
+        self._search_results[content_id] = tool_result
+        return content_id
     
-    def research_node(self, state: ResearchState) -> ResearchState:
-        logger.debug(f"Research node input state: {state}")
-        logger.info(f"Starting research for component: {state.get('component', 'Unknown')}")
+    async def research_node(self, state: ResearchState, config: RunnableConfig) -> ResearchState:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Research node input state: %s", state)
+        logger.info("Starting research for component: %s", state.get('component', 'Unknown'))
         
         try:
             search_history = state.get('search_history', [])
+            seen_queries = state.get('seen_queries') or set()
             component = state.get('component')
 
-            query = self._generate_search_query(component)
-            logger.debug(f"LLM generated query: {query}")
+            query = await self._generate_search_query(component)
+            logger.debug("LLM generated query: %s", query)
 
-            if self._check_duplicate_search(search_history, query):
+            if query in seen_queries:
                 logger.warning("Duplicate search detected")
                 return {'termination_reason': 'duplicate_search'}
             
-            tool_result = self._execute_search(query)
+            tool_result = await self._execute_search(query)
             
-            updated_history = search_history + [SearchAttempt(
+            if self._speculate_deep_search:
+                self._start_speculative_deep_search(config, component)
+            
+            attempt = SearchAttempt(
                 query=query, 
                 mode='sonar-pro', 
-                results=tool_result, 
+                content_id=self._store_search_result(config, search_history, tool_result), 
                 confidence=0.0
-            )]
+            )
             
             return {
-                'search_history': updated_history,
+                'search_history': [attempt],
+                'seen_queries': {query},
                 'iteration_count': state.get('iteration_count', 0) + 1
             }
             
         except Exception as e:
-            logger.error(f"Research node failed: {str(e)}")
+            logger.error("Research node failed: %s", e)
             return {
                 'termination_reason': f'error: {str(e)}',
                 'iteration_count': state.get('iteration_count', 0) + 1
             }
     
-    def _extract_search_content(self, search_history: list) -> str:
+    def _extract_search_content(self, search_history: list, component: str) -> str:
         if not search_history:
             raise ValueError("No search history available for verification")
         
         last_search = search_history[-1]
-        search_results = last_search.get('results', {})
-        return search_results.get('raw_content', '')
+        search_results = self._search_results.get(last_search.get('content_id'), {})
+        raw_content = search_results.get('raw_content') or ''
+        if len(raw_content) > self._max_raw_content_chars:
+            compressed = self._compress_raw_content(raw_content, component)
+            logger.info("Compressed search content from %d to %d chars", len(raw_content), len(compressed))
+            raw_content = compressed
+        return raw_content
     
-    def _categorize_sources(self, active_sources, eos_sources, state: ResearchState) -> tuple:
-        verified_sources = state.get('verified_sources', [])
-        failed_sources = state.get('failed_sources', [])
+    def _compress_raw_content(self, raw_content: str, component: str) -> str:
+        # Keep the paragraphs with the most lifecycle keywords, component terms and source URLs,
+        # in their original order, until the character budget is spent
+        paragraphs = [p.strip() for p in _PARAGRAPH_SPLIT_RE.split(raw_content) if p.strip()]
+        component_terms = {term for term in _WORD_RE.findall(component.casefold()) if len(term) > 1}
         
-        all_sources = []
-        if active_sources:
-            all_sources.extend(active_sources)
-        if eos_sources:
-            all_sources.extend(eos_sources)
-
-        for source in all_sources:
-            if source.credibility_score >= 70:
-                verified_sources.append(source.url)
-            else:
-                failed_sources.append(source.url)
+        def score(paragraph: str) -> int:
+            folded = paragraph.casefold()
+            return len(_LIFECYCLE_KEYWORD_RE.findall(paragraph)) + sum(term in folded for term in component_terms)
         
-        return verified_sources, failed_sources
+        ranked = sorted(range(len(paragraphs)), key=lambda i: -score(paragraphs[i]))
+        kept, used = [], 0
+        for i in ranked:
+            size = len(paragraphs[i]) + 2
+            if used + size <= self._max_raw_content_chars:
+                kept.append(i)
+                used += size
+        
+        if not kept:
+            return raw_content[:self._max_raw_content_chars]
+        return "\n\n".join(paragraphs[i] for i in sorted(kept))
     
-    def verification_node(self, state: ResearchState) -> ResearchState:
-        logger.debug(f"Verification node input state: {state}")
-        logger.info(f"Verifying results for iteration {state.get('iteration_count', 0)}")
+    def _categorize_sources(self, active_sources, eos_sources, state: ResearchState) -> tuple:
+        return score_sources(
+            [(source.url, source.credibility_score) for source in chain(active_sources or (), eos_sources or ())],
+            state.get('verified_sources') or [],
+            state.get('failed_sources') or [],
+        )
+    
+    async def _verify_content(self, component: str, raw_content: str) -> tuple:
+        cache_key = hashlib.sha256(f"{component}\n{raw_content}".encode('utf-8')).hexdigest()
+        # Tasks are cached while in flight so duplicate components in a batch share one verification
+        task = self._verification_cache.get(cache_key)
+        if task is not None:
+            logger.info("Verification cache hit for component: %s", component)
+        else:
+            task = asyncio.ensure_future(self._run_verification(component, raw_content))
+            task.add_done_callback(partial(self._on_verification_done, cache_key))
+            self._verification_cache[cache_key] = task
+        return await asyncio.shield(task)
+    
+    def _on_verification_done(self, cache_key: str, task: asyncio.Future):
+        # Failed verifications are not cached, so the next attempt retries
+        if (task.cancelled() or task.exception() is not None) and self._verification_cache.get(cache_key) is task:
+            del self._verification_cache[cache_key]
+    
+    async def _run_verification(self, component: str, raw_content: str) -> tuple:
+        active_prompt = self._active_tpl(component=component, raw_content=raw_content)
+        eos_prompt = self._eos_tpl(component=component, raw_content=raw_content)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Active verification prompt: %s", active_prompt)
+            logger.debug("EOS verification prompt: %s", eos_prompt)
+        results = await self.verification_llm.ainvoke({
+            'active': [self._active_system, HumanMessage(content=active_prompt)],
+            'eos': [self._eos_system, HumanMessage(content=eos_prompt)],
+        })
+        return results['active'], results['eos']
+    
+    async def verification_node(self, state: ResearchState) -> ResearchState:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Verification node input state: %s", state)
+        logger.info("Verifying results for iteration %s", state.get('iteration_count', 0))
         
         try:
             search_history = state.get('search_history', [])
-            raw_content = self._extract_search_content(search_history)
             component = state.get('component')
+            raw_content = self._extract_search_content(search_history, component)
 
-            active_prompt = prompt_loader.get_prompt(
-                "verification_active",
-                "analysis",
-                component=component,
-                raw_content=raw_content
-            )
-            eos_prompt = prompt_loader.get_prompt(
-                "verification_eos",
-                "analysis",
-                component=component,
-                raw_content=raw_content
-            )
-
-            logger.debug(f"Active verification prompt: {active_prompt}")
-            active = self.active_verification_llm.invoke([HumanMessage(content=active_prompt)])
-
-            logger.debug(f"EOS verification prompt: {eos_prompt}")
-            eos = self.eos_verification_llm.invoke([HumanMessage(content=eos_prompt)])
+            active, eos = await self._verify_content(component, raw_content)
 
             combined_result = {
                 'active_date': active.active_date,
-                'active_date_sources': [s.dict() for s in (active.active_date_sources or [])],
+                'active_date_sources': _SOURCES_ADAPTER.dump_python(active.active_date_sources or []),
                 'eos_date': eos.eos_date,
-                'eos_date_sources': [s.dict() for s in (eos.eos_date_sources or [])],
+                'eos_date_sources': _SOURCES_ADAPTER.dump_python(eos.eos_date_sources or []),
                 'confidence_active': active.confidence_active,
                 'confidence_eos': eos.confidence_eos,
                 'status_active': active.status_active,
@@ -159,7 +273,7 @@ class Nodes:
             }
             
         except Exception as e:
-            logger.error(f"Verification failed: {str(e)}")
+            logger.error("Verification failed: %s", e)
             return {
                 'confidence_score': 0.0,
                 'termination_reason': f'error: {str(e)}',
@@ -176,60 +290,91 @@ class Nodes:
     
         return f"{component} lifecycle support dates"
     
-    def _execute_deep_search(self, query: str):
-        return deep_search.invoke({'query': query})
+    async def _execute_deep_search(self, query: str):
+        return await deep_search.ainvoke({'query': query})
+    
+    def _start_speculative_deep_search(self, config: RunnableConfig, component: str):
+        # The follow-up query before verification has run is the generic lifecycle query
+        query = self._generate_followup_query({'component': component})
+        task = asyncio.ensure_future(self._execute_deep_search(query))
+        self._speculative_searches[config['configurable']['thread_id']] = (query, task)
+    
+    async def _cancel_speculative_deep_search(self, config: RunnableConfig):
+        speculative = self._speculative_searches.pop(config['configurable']['thread_id'], None)
+        if speculative is not None:
+            await self._cancel_search_task(speculative[1])
+    
+    async def _cancel_search_task(self, task: asyncio.Future):
+        # Cancelling the task reaches PerplexityClient, which aborts the HTTP request once no
+        # other caller shares it; waiting here makes sure that has happened before moving on
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    
+    async def _followup_search_result(self, config: RunnableConfig, query: str) -> dict:
+        speculative = self._speculative_searches.pop(config['configurable']['thread_id'], None)
+        if speculative is not None:
+            speculative_query, task = speculative
+            if speculative_query == query:
+                logger.info("Using speculative deep search for query: %s", query)
+                return await task
+            await self._cancel_search_task(task)
+        return await self._execute_deep_search(query)
     
-    def followup_research_node(self, state: ResearchState) -> ResearchState:
-        logger.debug(f"Followup research node input state: {state}")
-        logger.info(f"Starting follow-up research for component: {state.get('component', 'Unknown')}")
+    async def followup_research_node(self, state: ResearchState, config: RunnableConfig) -> ResearchState:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Followup research node input state: %s", state)
+        logger.info("Starting follow-up research for component: %s", state.get('component', 'Unknown'))
         
         try:
             followup_query = self._generate_followup_query(state)
-            logger.debug(f"Follow-up query: {followup_query}")
+            logger.debug("Follow-up query: %s", followup_query)
  
-            tool_result = self._execute_deep_search(followup_query)
+            tool_result = await self._followup_search_result(config, followup_query)
  
             search_history = state.get('search_history', [])
-            updated_history = search_history + [SearchAttempt(
+            attempt = SearchAttempt(
                 query=followup_query,
                 mode='deep',
-                results=tool_result,
+                content_id=self._store_search_result(config, search_history, tool_result),
                 confidence=0.0
-            )]
+            )
             
             return {
-                'search_history': updated_history,
+                'search_history': [attempt],
+                'seen_queries': {followup_query},
                 'iteration_count': state.get('iteration_count', 0) + 1
             }
             
         except Exception as e:
-            logger.error(f"Follow-up research failed: {str(e)}")
+            logger.error("Follow-up research failed: %s", e)
             return {
                 'termination_reason': f'error: {str(e)}',
                 'iteration_count': state.get('iteration_count', 0) + 1
             }
  
     def decision_node(self, state: ResearchState) -> str:
-        logger.debug(f"Decision node input state: {state}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Decision node input state: %s", state)
         iterations = state.get('iteration_count', 0)
+        if iterations >= _MAX_ITERATIONS:
+            logger.info("Decision: iterations=%s, iteration limit reached", iterations)
+            return "output_generation"
+
         current_results = state.get('current_results') or {}
         conf_active = current_results.get('confidence_active', 0.0) or 0.0
         conf_eos = current_results.get('confidence_eos', None)
         status_active = current_results.get('status_active', 'not_found')
         status_eos = current_results.get('status_eos', 'not_found')
 
-        active_threshold = 85.0
-        eos_threshold = 85.0
-
-        active_ok = (status_active == "verified" and conf_active >= active_threshold)
+        active_ok = (status_active == "verified" and conf_active >= _ACTIVE_THRESHOLD)
         eos_ok = (
-            (status_eos in {"verified", "derived"} and (conf_eos or 0.0) >= eos_threshold)
-            or status_eos == "not_applicable"
+            status_eos == "not_applicable"
+            or (status_eos in _EOS_OK_STATUSES and (conf_eos or 0.0) >= _EOS_THRESHOLD)
         )
 
-        logger.info(f"Decision: iterations={iterations}, active_ok={active_ok}, eos_ok={eos_ok}")
+        logger.info("Decision: iterations=%s, active_ok=%s, eos_ok=%s", iterations, active_ok, eos_ok)
 
-        if (active_ok and eos_ok) or iterations >= 2:
+        if active_ok and eos_ok:
             return "output_generation"
         else:
             return "followup_research"
@@ -273,10 +418,15 @@ class Nodes:
             'status_eos': current_results.get('status_eos'),
         }
     
-    def output_generation_node(self, state: ResearchState) -> ResearchState:
-        logger.debug(f"Output generation node input state: {state}")
+    async def output_generation_node(self, state: ResearchState, config: RunnableConfig) -> ResearchState:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Output generation node input state: %s", state)
         logger.info("Generating final output")
         
+        await self._cancel_speculative_deep_search(config)
+        for attempt in state.get('search_history', []):
+            self._search_results.pop(attempt.get('content_id'), None)
+        
         try:
             current_results = state.get('current_results')
             
@@ -286,9 +436,10 @@ class Nodes:
             else:
                 output = self._create_successful_output(state, current_results)
             
-            logger.debug(f"Generated output: {output}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Generated output: %s", output)
             return {'output': output, 'termination_reason': 'completed'}
             
         except Exception as e:
-            logger.error(f"Output generation failed: {str(e)}")
+            logger.error("Output generation failed: %s", e)
             return {'termination_reason': f'error: {str(e)}'}
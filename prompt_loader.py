@@ -1,28 +1,44 @@
 import yaml
 from pathlib import Path
-from typing import Dict, Any
+from typing import Callable, Dict, Any
+
+# libyaml's C loader when PyYAML was built with it
+_YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+def _make_renderer(template: str) -> Callable[..., str]:
+    def render(**kwargs) -> str:
+        return template.format_map(kwargs)
+    
+    return render
 
 class PromptLoader:
     _instance = None
     _prompts = None
+    _compiled = None
     
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
+            cls._instance._load_prompts()
         return cls._instance
     
-    def __init__(self):
-        if self._prompts is None:
-            self._load_prompts()
-    
     def _load_prompts(self):
         prompts_file = Path(__file__).parent / "prompts.yaml"
         with open(prompts_file, 'r', encoding='utf-8') as f:
-            self._prompts = yaml.safe_load(f)
+            self._prompts = yaml.load(f, Loader=_YamlLoader)
+        
+        self._compiled = {
+            (category, prompt_name): _make_renderer(template)
+            for category, prompts in self._prompts.items()
+            for prompt_name, template in prompts.items()
+            if isinstance(template, str)
+        }
+    
+    def compile(self, category: str, prompt_name: str) -> Callable[..., str]:
+        return self._compiled[(category, prompt_name)]
     
     def get_prompt(self, category: str, prompt_name: str, **kwargs) -> str:
-        prompt_template = self._prompts[category][prompt_name]
-        return prompt_template.format(**kwargs)
+        return self.compile(category, prompt_name)(**kwargs)
     
     def get_all_prompts(self) -> Dict[str, Any]:
         return self._prompts
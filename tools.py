@@ -1,11 +1,34 @@
 import os
+import re
+import asyncio
 import logging
+import importlib.util
+from collections import OrderedDict
+from functools import partial
+import httpx
 from langchain_core.tools import tool
-from openai import OpenAI
+from openai import AsyncOpenAI
+from config import Config
 from prompt_loader import prompt_loader
 
 logger = logging.getLogger(__name__)
 
+_WS_RE = re.compile(r"\s+")
+# Markers that a streamed answer already holds what verification needs: both dates and a source URL
+_EARLY_STOP_RES = (
+    re.compile(r"(?:release|general availability|\bGA\b|launch|active)[^\n]{0,60}?\b\d{4}\b", re.IGNORECASE),
+    re.compile(r"(?:\bEOL\b|\bEOS\b|end[- ]of[- ](?:life|support))[^\n]{0,60}?\b\d{4}\b", re.IGNORECASE),
+    re.compile(r"https?://"),
+)
+_EARLY_STOP_CHECK_CHARS = 512
+_SEARCH_CACHE_MAXSIZE = 128
+_LEADING_STRIP = " \"'"
+_TRAILING_STRIP = " \"'.,;:!?"
+
+def _normalize_query(query: str) -> str:
+    # Only differences that cannot change the answer: case, spacing, wrapping quotes, trailing punctuation
+    return _WS_RE.sub(" ", query).lstrip(_LEADING_STRIP).rstrip(_TRAILING_STRIP).casefold()
+
 class PerplexityClient:
     def __init__(self):
         self.api_key = os.getenv("PERPLEXITY_API_KEY")
@@ -13,25 +36,92 @@ class PerplexityClient:
             logger.error("Perplexity API key is required")
             raise ValueError("Perplexity API key is required")
         
-        self.client = OpenAI(api_key=self.api_key, base_url="https://api.perplexity.ai")
+        # One pooled connection set shared by every search; HTTP/2 multiplexing needs the optional h2 package
+        http_client = httpx.AsyncClient(
+            http2=importlib.util.find_spec("h2") is not None,
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+            timeout=httpx.Timeout(600.0, connect=5.0),
+        )
+        self.client = AsyncOpenAI(
+            api_key=self.api_key,
+            base_url="https://api.perplexity.ai",
+            http_client=http_client,
+        )
+        # LRU of search tasks by (model, prompt_type, normalized query). Tasks are stored while in
+        # flight so concurrent duplicates share one request; failed or cancelled searches are dropped
+        self._cache = OrderedDict()
+        # In-flight task -> number of callers awaiting it; the last one to give up cancels the request
+        self._waiters = {}
+        self._stream_early_stop = Config.pplx_stream_early_stop()
     
-    def search(self, query: str, model: str, prompt_type: str) -> dict:
+    async def search(self, query: str, model: str, prompt_type: str) -> dict:
         """Perform search with specified model and prompt type."""
+        cache_key = (model, prompt_type, _normalize_query(query))
+        task = self._cache.get(cache_key)
+        if task is not None:
+            self._cache.move_to_end(cache_key)
+            logger.info("Search cache hit for query: %s using model: %s", query, model)
+        else:
+            task = asyncio.ensure_future(self._search(query, model, prompt_type))
+            task.add_done_callback(partial(self._on_search_done, cache_key))
+            self._cache[cache_key] = task
+            if len(self._cache) > _SEARCH_CACHE_MAXSIZE:
+                self._cache.popitem(last=False)
+        
+        if task.done():
+            return dict(task.result())
+        
+        # Shielded so one caller's timeout or cancellation does not cancel a request others share
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            result = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            self._release_waiter(task, cache_key)
+            raise
+        self._release_waiter(task, cache_key)
+        return dict(result)
+    
+    def _release_waiter(self, task: asyncio.Future, cache_key: tuple):
+        remaining = self._waiters.get(task, 1) - 1
+        if remaining > 0:
+            self._waiters[task] = remaining
+            return
+        self._waiters.pop(task, None)
+        if not task.done():
+            logger.info("Cancelling abandoned search for query: %s using model: %s", cache_key[2], cache_key[0])
+            task.cancel()
+            self._evict(cache_key, task)
+    
+    def _on_search_done(self, cache_key: tuple, task: asyncio.Future):
+        self._waiters.pop(task, None)
+        if task.cancelled() or "error" in task.result():
+            self._evict(cache_key, task)
+    
+    def _evict(self, cache_key: tuple, task: asyncio.Future):
+        if self._cache.get(cache_key) is task:
+            del self._cache[cache_key]
+    
+    async def _search(self, query: str, model: str, prompt_type: str) -> dict:
         system_prompt = prompt_loader.get_prompt("tools", prompt_type)
         messages = [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": query},
         ]
-        logger.debug(f"Perplexity {prompt_type} input: query={query}, messages={messages}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Perplexity %s input: query=%s, messages=%s", prompt_type, query, messages)
         
         try:
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=messages,
-            )
-            content = response.choices[0].message.content
-            logger.debug(f"Perplexity {prompt_type} raw response: {content}")
-            logger.info(f"Search completed for query: {query} using model: {model}")
+            if self._stream_early_stop:
+                content = await self._stream_until_sufficient(model, messages)
+            else:
+                response = await self.client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                )
+                content = response.choices[0].message.content
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Perplexity %s raw response: %s", prompt_type, content)
+            logger.info("Search completed for query: %s using model: %s", query, model)
             
             return {
                 "raw_content": content,
@@ -39,9 +129,50 @@ class PerplexityClient:
                 "model": model
             }
         except Exception as e:
-            logger.error(f"Search failed: {str(e)}")
+            logger.error("Search failed: %s", e)
             return {"error": str(e), "query": query}
 
+    async def warmup(self):
+        """Open a pooled connection to Perplexity before the first search needs it."""
+        try:
+            await self.client.with_options(max_retries=0, timeout=5.0).models.list()
+        except Exception as e:
+            # Any HTTP response, even an error status, means the TCP/TLS connection is pooled
+            logger.debug("Perplexity warmup request returned: %s", e)
+    
+    async def _stream_until_sufficient(self, model: str, messages: list) -> str:
+        stream = await self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            stream=True,
+        )
+        parts = []
+        size = checked_size = 0
+        try:
+            async for chunk in stream:
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+                parts.append(chunk.choices[0].delta.content)
+                size += len(parts[-1])
+                # Re-scan only every few hundred characters so the check stays linear overall
+                if size - checked_size >= _EARLY_STOP_CHECK_CHARS:
+                    checked_size = size
+                    content = "".join(parts)
+                    # sonar-deep-research opens with <think> reasoning that mentions dates and URLs
+                    # too; only the answer after </think> may trigger an early stop
+                    answer = content
+                    if content.lstrip().startswith("<think>"):
+                        think_end = content.find("</think>")
+                        if think_end == -1:
+                            continue
+                        answer = content[think_end + len("</think>"):]
+                    if all(pattern.search(answer) for pattern in _EARLY_STOP_RES):
+                        logger.info("Stopping %s stream early after %d chars", model, size)
+                        return content
+        finally:
+            await stream.close()
+        return "".join(parts)
+
 # Lazy initialization - only create client when tools are actually called
 _perplexity_client = None
 
@@ -51,14 +182,27 @@ def _get_perplexity_client():
         _perplexity_client = PerplexityClient()
     return _perplexity_client
 
+async def warmup_search_client():
+    try:
+        await _get_perplexity_client().warmup()
+    except ValueError as e:
+        logger.warning("Perplexity client warmup skipped: %s", e)
+
+async def _search_with_timeout(query: str, model: str, prompt_type: str, timeout: float) -> dict:
+    try:
+        return await asyncio.wait_for(_get_perplexity_client().search(query, model, prompt_type), timeout=timeout)
+    except asyncio.TimeoutError:
+        logger.error("Search timed out after %ss for query: %s using model: %s", timeout, query, model)
+        return {"error": "timeout", "query": query}
+
 @tool
-def initial_search(query: str) -> dict:
+async def initial_search(query: str) -> dict:
     """Perform initial fast search using sonar-pro mode."""
-    return _get_perplexity_client().search(query, 'sonar-pro', 'initial_search_system')
+    return await _search_with_timeout(query, 'sonar-pro', 'initial_search_system', Config.pplx_timeout_secs())
 
 @tool
-def deep_search(query: str) -> dict:
+async def deep_search(query: str) -> dict:
     """Perform deep verification search using sonar-deep-research mode."""
-    return _get_perplexity_client().search(query, 'sonar-deep-research', 'deep_search_system')
+    return await _search_with_timeout(query, 'sonar-deep-research', 'deep_search_system', Config.pplx_deep_timeout_secs())
 
 tools = [initial_search, deep_search] 
\ No newline at end of file